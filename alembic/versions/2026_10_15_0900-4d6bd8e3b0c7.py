@@ -0,0 +1,36 @@
+"""Store vehicle positions coordinates as double precision
+
+Revision ID: 4d6bd8e3b0c7
+Revises: 7076062a2ab9
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d6bd8e3b0c7'
+down_revision: Union[str, None] = '7076062a2ab9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+               ALTER TABLE vehicle_positions
+                   ALTER COLUMN latitude TYPE DOUBLE PRECISION USING latitude::double precision,
+                   ALTER COLUMN longitude TYPE DOUBLE PRECISION USING longitude::double precision;
+               """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+               ALTER TABLE vehicle_positions
+                   ALTER COLUMN latitude TYPE NUMERIC(38, 18) USING latitude::numeric(38, 18),
+                   ALTER COLUMN longitude TYPE NUMERIC(38, 18) USING longitude::numeric(38, 18);
+               """)
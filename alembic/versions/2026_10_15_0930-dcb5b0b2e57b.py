@@ -0,0 +1,37 @@
+"""Add BRIN indexes on vehicles & vehicle_positions partition columns
+
+Revision ID: dcb5b0b2e57b
+Revises: 4d6bd8e3b0c7
+Create Date: 2026-10-15 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dcb5b0b2e57b'
+down_revision: Union[str, None] = '4d6bd8e3b0c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Indexes created on the partitioned tables are propagated to every partition
+    op.execute("""
+               CREATE INDEX vehicles_brin
+                   ON vehicles USING BRIN (partition_dt) WITH (pages_per_range = 32);
+               """)
+    op.execute("""
+               CREATE INDEX vehicle_positions_brin
+                   ON vehicle_positions USING BRIN (partition_dt, timestamp) WITH (pages_per_range = 32);
+               """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS vehicle_positions_brin;")
+    op.execute("DROP INDEX IF EXISTS vehicles_brin;")
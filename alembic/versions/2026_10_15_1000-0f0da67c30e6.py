@@ -0,0 +1,61 @@
+"""Manage vehicles & vehicle_positions daily partitions with pg_partman
+
+Revision ID: 0f0da67c30e6
+Revises: dcb5b0b2e57b
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0f0da67c30e6'
+down_revision: Union[str, None] = 'dcb5b0b2e57b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SCHEMA IF NOT EXISTS partman;")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_partman SCHEMA partman VERSION '5.2.4';")
+
+    # Daily partitions are pre-created ahead of time by the pg_partman background worker
+    op.execute("""
+               SELECT partman.create_parent(
+                   p_parent_table := 'public.vehicles',
+                   p_control := 'partition_dt',
+                   p_interval := '1 day'
+               );
+               """)
+    op.execute("""
+               SELECT partman.create_parent(
+                   p_parent_table := 'public.vehicle_positions',
+                   p_control := 'partition_dt',
+                   p_interval := '1 day'
+               );
+               """)
+
+    # Expired partitions are dropped instead of deleting rows, positions first as they reference vehicles
+    op.execute("""
+               UPDATE partman.part_config
+               SET retention            = '30 days',
+                   retention_keep_table = false
+               WHERE parent_table = 'public.vehicle_positions';
+               """)
+    op.execute("""
+               UPDATE partman.part_config
+               SET retention            = '31 days',
+                   retention_keep_table = false
+               WHERE parent_table = 'public.vehicles';
+               """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Existing partitions are kept as regular partitions, only their automatic management is removed
+    op.execute("DROP EXTENSION IF EXISTS pg_partman;")
+    op.execute("DROP SCHEMA IF EXISTS partman CASCADE;")
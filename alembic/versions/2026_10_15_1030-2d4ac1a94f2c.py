@@ -0,0 +1,77 @@
+"""Store vehicles line_product as a smallint code instead of an enum
+
+Revision ID: 2d4ac1a94f2c
+Revises: 0f0da67c30e6
+Create Date: 2026-10-15 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d4ac1a94f2c'
+down_revision: Union[str, None] = '0f0da67c30e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Codes must match app.db.models.LineProductType
+    op.execute("ALTER TABLE vehicles ADD COLUMN line_product_code SMALLINT;")
+    op.execute("""
+               UPDATE vehicles
+               SET line_product_code = CASE line_product
+                                           WHEN 'BUS' THEN 1
+                                           WHEN 'SUBWAY' THEN 2
+                                           WHEN 'TRAMWAY' THEN 3
+                                           WHEN 'SUBURBAN' THEN 4
+                                           WHEN 'FERRY' THEN 5
+                                           WHEN 'EXPRESS' THEN 6
+                                           WHEN 'REGIONAL' THEN 7
+                   END;
+               """)
+    op.execute("ALTER TABLE vehicles DROP COLUMN line_product;")
+    op.execute("ALTER TABLE vehicles RENAME COLUMN line_product_code TO line_product;")
+    op.execute("ALTER TABLE vehicles ALTER COLUMN line_product SET NOT NULL;")
+
+    # The pg_partman template table is a copy of vehicles and must not depend on the enum type either, it is empty
+    op.execute("""
+               ALTER TABLE IF EXISTS partman.template_public_vehicles
+                   DROP COLUMN line_product,
+                   ADD COLUMN line_product SMALLINT NOT NULL;
+               """)
+    op.execute("DROP TYPE line_product_enum;")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+            CREATE TYPE line_product_enum AS ENUM (
+                'BUS', 'SUBWAY', 'TRAMWAY', 'SUBURBAN', 'FERRY', 'EXPRESS', 'REGIONAL'
+            );
+        """)
+    op.execute("ALTER TABLE vehicles ADD COLUMN line_product_enum line_product_enum;")
+    op.execute("""
+               UPDATE vehicles
+               SET line_product_enum = CASE line_product
+                                           WHEN 1 THEN 'BUS'
+                                           WHEN 2 THEN 'SUBWAY'
+                                           WHEN 3 THEN 'TRAMWAY'
+                                           WHEN 4 THEN 'SUBURBAN'
+                                           WHEN 5 THEN 'FERRY'
+                                           WHEN 6 THEN 'EXPRESS'
+                                           WHEN 7 THEN 'REGIONAL'
+                   END::line_product_enum;
+               """)
+    op.execute("ALTER TABLE vehicles DROP COLUMN line_product;")
+    op.execute("ALTER TABLE vehicles RENAME COLUMN line_product_enum TO line_product;")
+    op.execute("ALTER TABLE vehicles ALTER COLUMN line_product SET NOT NULL;")
+    op.execute("""
+               ALTER TABLE IF EXISTS partman.template_public_vehicles
+                   DROP COLUMN line_product,
+                   ADD COLUMN line_product line_product_enum NOT NULL;
+               """)
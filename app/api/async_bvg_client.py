@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.api.base_bvg_client import BaseBVGClient, Payload
+from app.api.token_bucket import TokenBucket
+
+
+class AsyncBVGClient(BaseBVGClient):
+    """
+    Asynchronous client for the BVG API, exposing the same endpoints as ``BVGClient`` as coroutines.
+    Requests are multiplexed over HTTP/2 so that many radar polls can share a single connection.
+    The cache, the rate limiting and the retry policy are described in ``BaseBVGClient``.
+    """
+    max_keepalive_connections: int = 8
+    max_connections: int = 32
+
+    def __init__(
+            self,
+            max_retries: Optional[int] = None,
+            retry_delay_seconds: Optional[int] = None,
+            cache_max_size: Optional[int] = None,
+            bucket: Optional[TokenBucket] = None,
+            timer: Callable[[], float] = time.time,
+            transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        super().__init__(
+            max_retries=max_retries,
+            retry_delay_seconds=retry_delay_seconds,
+            cache_max_size=cache_max_size,
+            bucket=bucket,
+            timer=timer
+        )
+        self.client: httpx.AsyncClient = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=self.max_keepalive_connections,
+                max_connections=self.max_connections
+            ),
+            headers=self.session_headers,
+            transport=transport
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the connections of the HTTP client.
+        """
+        await self.client.aclose()
+
+    async def _call_api(
+            self,
+            url: str,
+            params: Optional[str] = None
+    ) -> Optional[Payload]:
+        """
+        Call the API on the given URL and return the payload, see ``BVGClient._call_api``.
+        :param url:
+        :param params: The URL-encoded query string
+        :return:
+        """
+        now: float = self.timer()
+        cache_key: str = self._cache_key(url, params)
+        fresh: Optional[Dict[str, Any]] = self._cache_get_fresh(url, cache_key)
+
+        if fresh is not None:
+            return fresh['payload']
+
+        cached: Optional[Dict[str, Any]] = self._cache_get(cache_key)
+        headers: Dict[str, str] = self._conditional_headers(cached)
+
+        for attempt in range(1, self.max_retries + 1):
+            self.logger.info(f"Attempt {attempt}/{self.max_retries} for {url}")
+            await self.bucket.acquire_async()
+            response: httpx.Response = await self.client.get(
+                url=url,
+                params=params,
+                headers=headers,
+            )
+            retry, payload = self._handle_response(
+                url, cache_key, cached, response.status_code, response.headers, response.content, now
+            )
+
+            if not retry:
+                return payload
+
+            await asyncio.sleep(self._get_retry_delay(response.headers, attempt))
+
+        self.logger.error(f"All attempts for {url} have failed")
+        return None
+
+    async def get_stops(
+            self,
+            query: Optional[str] = None,
+            fuzzy: bool = True,
+            max_results: int = 10_000
+    ) -> List[Dict[str, Any]]:
+        """
+        Return matching stops or all stops if no query is given, see ``BVGClient.get_stops``.
+        """
+        return await self._call_api(
+            url=self.stops_url,
+            params=self._stops_params(query, fuzzy, max_results)
+        )
+
+    async def get_radar(
+            self,
+            north_latitude: float,
+            west_longitude: float,
+            south_latitude: float,
+            east_longitude: float,
+            max_number_of_vehicles: int = 256,
+            seconds_between_frames: int = 30,
+            frames: int = 1,
+            polylines: bool = False,
+            language: str = 'en',
+            pretty_print_json: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find all vehicles currently in an area as well as their movements, see ``BVGClient.get_radar``.
+        """
+        return await self._call_api(
+            url=self.radar_url,
+            params=self._radar_params(
+                north_latitude,
+                west_longitude,
+                south_latitude,
+                east_longitude,
+                max_number_of_vehicles,
+                seconds_between_frames,
+                frames,
+                polylines,
+                language,
+                pretty_print_json
+            )
+        )
+
+    async def get_radar_bulk(
+            self,
+            bounding_boxes: List[Tuple[float, float, float, float]],
+            max_workers: int = 8,
+            **kwargs: Any
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Find all vehicles in several areas concurrently, the requests being multiplexed over the HTTP/2 connection.
+        :param bounding_boxes: Areas as ``(north_latitude, west_longitude, south_latitude, east_longitude)`` tuples
+        :param max_workers: Number of concurrent requests, capped at the connection limit
+        :param kwargs: Other parameters forwarded to ``get_radar``
+        :return: The API JSON responses, or None for those where an error occurred, in the order of the areas
+        """
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(min(max_workers, self.max_connections))
+
+        async def get_radar(bounding_box: Tuple[float, float, float, float]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_radar(*bounding_box, **kwargs)
+
+        return list(await asyncio.gather(*(get_radar(bounding_box) for bounding_box in bounding_boxes)))
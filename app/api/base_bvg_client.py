@@ -0,0 +1,374 @@
+import logging
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from logging import Logger
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type, Union
+from urllib.parse import urlencode
+
+import orjson
+from cachetools import LRUCache, TLRUCache
+
+from app.api.token_bucket import TokenBucket
+from config import BaseConfig, get_config
+
+# Cache-Control ``max-age`` directive as defined in RFC 7234 (e.g. ``public, max-age=3600``)
+_MAX_AGE_RE: re.Pattern = re.compile(r'(?:^|[,\s])max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+Payload = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+
+def _normalize_etag(raw: str) -> str:
+    """
+    Normalize an ETag for weak comparison (RFC 9110 section 8.8.3.2): ``W/"abc"``, ``"abc"`` and ``abc`` are equal.
+    :param raw: The ETag as sent by the API
+    :return: The opaque tag without weakness indicator nor quotes
+    """
+    etag: str = raw.strip()
+
+    if etag.startswith('W/'):
+        etag = etag[2:]
+
+    if len(etag) >= 2 and etag[0] == etag[-1] == '"':
+        etag = etag[1:-1]
+
+    return etag
+
+
+class BaseBVGClient:
+    """
+    Transport-agnostic part of the BVG API clients: cache, rate limiting, retry policy and query strings.
+    The API has no authentification but a rate limit of 100 requests per minute, requests are throttled beforehand
+    with an adaptive token bucket.
+    The API sends ETag, Last-Modified and Cache-Control headers to allow the client to cache responses.
+    Responses are cached with their decoded JSON payload in two bounded caches sharing the same entries:
+    ``cache`` only holds fresh entries, which expire on their own after ``max-age``, and ``validators`` remembers
+    the least recently used entries past their expiry so that they can still be revalidated with an HTTP 304.
+    Expiries are computed and checked with the same ``timer`` clock, ``time.time`` by default.
+    The raw ETag is sent back in ``If-None-Match``, the normalized one is used to compare ETags weakly.
+    Entry format: ``{url?query: {"etag": str, "normalized_etag": str, "last_modified": str, "payload": dict | list,
+    "max_age": int, "expiry": float}}``
+    """
+    logger: Logger = logging.getLogger("bvg_client")
+    base_url: str = "https://v6.bvg.transport.rest"
+    stops_url: str = f"{base_url}/stops"
+    radar_url: str = f"{base_url}/radar"
+    max_retry_delay_seconds: int = 60
+    session_headers: Dict[str, str] = {
+        "Connection": "keep-alive",
+        "Accept-Encoding": "gzip, deflate",
+        "User-Agent": "berlin-transit/1.0",
+    }
+
+    def __init__(
+            self,
+            max_retries: Optional[int] = None,
+            retry_delay_seconds: Optional[int] = None,
+            cache_max_size: Optional[int] = None,
+            bucket: Optional[TokenBucket] = None,
+            timer: Callable[[], float] = time.time
+    ):
+        config: Type[BaseConfig] = get_config()
+        self.timer: Callable[[], float] = timer
+        self.cache_max_size: int = cache_max_size if cache_max_size is not None else config.BVG_API_CACHE_MAX_SIZE
+        self.cache: TLRUCache[str, Dict[str, Any]] = TLRUCache(
+            maxsize=self.cache_max_size,
+            ttu=self._cache_expiry,
+            timer=self.timer
+        )
+        self.validators: LRUCache[str, Dict[str, Any]] = LRUCache(maxsize=self.cache_max_size)
+        self.cache_lock: threading.Lock = threading.Lock()
+        self.max_retries: int = max_retries if max_retries is not None else config.BVG_API_MAX_RETRIES
+        self.retry_delay_seconds: int = (
+            retry_delay_seconds if retry_delay_seconds is not None else config.BVG_API_RETRY_DELAY_SECONDS
+        )
+        self.bucket: TokenBucket = bucket or TokenBucket(
+            capacity=config.BVG_API_RATE_LIMIT_CAPACITY,
+            refill_per_second=config.BVG_API_RATE_LIMIT_PER_SECOND,
+            rate_increase=config.BVG_API_RATE_LIMIT_INCREASE,
+            rate_decrease_factor=config.BVG_API_RATE_LIMIT_DECREASE_FACTOR
+        )
+        self.logger.setLevel(config.LOG_LEVEL)
+
+    def _get_max_age(self, cache_control: str) -> Optional[int]:
+        """
+        Extract the ``max-age`` directive (in seconds) from a Cache-Control header.
+        :param cache_control: The Cache-Control header value
+        :return: The max age in seconds or None if absent or not a valid number
+        """
+        match: Optional[re.Match] = _MAX_AGE_RE.search(cache_control)
+
+        if match is None:
+            return None
+
+        return int(match.group(1))
+
+    @staticmethod
+    def _cache_key(url: str, params: Optional[str]) -> str:
+        """
+        Return the cache key of a request, responses being cached per URL and query string.
+        :param url: The URL of the endpoint
+        :param params: The URL-encoded query string
+        :return: The cache key
+        """
+        return f"{url}?{params}" if params else url
+
+    @staticmethod
+    def _cache_expiry(key: str, entry: Dict[str, Any], now: float) -> float:
+        """
+        Return the expiry of a cache entry, entries without ``max-age`` are expired right away.
+        """
+        return entry['expiry'] if entry['expiry'] is not None else now
+
+    def _cache_get_fresh(self, url: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cache entry of the given key if it has not expired yet, marking it as the most recently used.
+        :param url: The URL of the endpoint
+        :param cache_key: The cache key, see ``_cache_key``
+        :return: The cache entry or None if the key is not cached or expired
+        """
+        with self.cache_lock:
+            fresh: Optional[Dict[str, Any]] = self.cache.get(cache_key)
+
+            if fresh is not None:
+                # Keep the validators of hot entries so that they are revalidated, not downloaded, once expired
+                self.validators.get(cache_key)
+
+        if fresh is not None:
+            self.logger.info(f"The cached response for {url} has not expired yet")
+
+        return fresh
+
+    def _cache_get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cache entry of the given key, fresh or expired, marking it as the most recently used.
+        :param cache_key: The cache key, see ``_cache_key``
+        :return: The cache entry or None if the key is not cached
+        """
+        with self.cache_lock:
+            return self.validators.get(cache_key)
+
+    def _cache_put(self, cache_key: str, entry: Dict[str, Any]) -> None:
+        """
+        Insert or refresh a cache entry, evicting the least recently used ones beyond ``cache_max_size``.
+        :param cache_key: The cache key, see ``_cache_key``
+        :param entry: The cache entry
+        """
+        with self.cache_lock:
+            self.validators[cache_key] = entry
+            self.cache[cache_key] = entry
+
+    @staticmethod
+    def _conditional_headers(cached: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Build the headers revalidating a cached response, the API answers HTTP 304 if it has not changed.
+        :param cached: The cache entry, None if absent
+        :return: The ``If-None-Match`` and ``If-Modified-Since`` headers, when known
+        """
+        headers: Dict[str, str] = {}
+
+        if cached is None:
+            return headers
+
+        if cached.get('etag') is not None:
+            headers['If-None-Match'] = cached['etag']
+
+        if cached.get('last_modified') is not None:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        return headers
+
+    def _cache_response(
+            self,
+            cache_key: str,
+            response_headers: Mapping[str, str],
+            payload: Payload,
+            now: float
+    ) -> None:
+        """
+        Cache a successful response if it provides a validator (ETag or Last-Modified).
+        :param cache_key: The cache key, see ``_cache_key``
+        :param response_headers: The headers of the response
+        :param payload: The decoded JSON payload of the response
+        :param now: Current timestamp from which the expiry is computed
+        """
+        etag: Optional[str] = response_headers.get('ETag')
+        last_modified: Optional[str] = response_headers.get('Last-Modified')
+        max_age: Optional[int] = self._get_max_age(response_headers.get('Cache-Control', ''))
+
+        if etag is not None:
+            self.logger.info(f"An ETag is provided, caching the response")
+        elif last_modified is not None:
+            self.logger.info(f"A Last-Modified date is provided, caching the response")
+        else:
+            return
+
+        self._cache_put(cache_key, {
+            'etag': etag,
+            'normalized_etag': _normalize_etag(etag) if etag is not None else None,
+            'last_modified': last_modified,
+            'payload': payload,
+            'max_age': max_age,
+            'expiry': now + max_age if max_age is not None else None
+        })
+
+    def _refresh_cache(
+            self,
+            cache_key: str,
+            cached: Dict[str, Any],
+            response_headers: Mapping[str, str],
+            now: float
+    ) -> None:
+        """
+        Refresh a cache entry revalidated by an HTTP 304, as required by RFC 7234 section 4.3.4: the validators and the
+        freshness sent with the 304 replace the stored ones, and the expiry restarts from now.
+        :param cache_key: The cache key, see ``_cache_key``
+        :param cached: The revalidated cache entry
+        :param response_headers: The headers of the 304 response
+        :param now: Current timestamp from which the expiry is computed
+        """
+        max_age: Optional[int] = self._get_max_age(response_headers.get('Cache-Control', ''))
+        etag: Optional[str] = response_headers.get('ETag', cached.get('etag'))
+
+        if max_age is None:
+            max_age = cached.get('max_age')
+
+        self._cache_put(cache_key, {
+            **cached,
+            'etag': etag,
+            'normalized_etag': _normalize_etag(etag) if etag is not None else None,
+            'last_modified': response_headers.get('Last-Modified', cached.get('last_modified')),
+            'max_age': max_age,
+            'expiry': now + max_age if max_age is not None else None
+        })
+
+    def _get_retry_delay(self, response_headers: Mapping[str, str], attempt: int) -> float:
+        """
+        Compute the delay before retrying a rate limited request.
+        The ``Retry-After`` header is honored when given in seconds, otherwise an exponential backoff starting at
+        ``retry_delay_seconds`` is used, with a 0.5-1.0 jitter multiplier.
+        Both are capped at ``max_retry_delay_seconds``.
+        :param response_headers: The headers of the rate limited response
+        :param attempt: The attempt number, starting at 1
+        :return: The delay in seconds
+        """
+        retry_after: Optional[str] = response_headers.get('Retry-After')
+
+        if retry_after is not None and retry_after.strip().isdigit():
+            return min(self.max_retry_delay_seconds, int(retry_after))
+
+        delay: float = min(self.max_retry_delay_seconds, self.retry_delay_seconds * 2 ** (attempt - 1))
+
+        return delay * random.uniform(0.5, 1.0)
+
+    def _decode_payload(
+            self,
+            cached: Optional[Dict[str, Any]],
+            response_headers: Mapping[str, str],
+            content: bytes
+    ) -> Payload:
+        """
+        Decode the payload of a successful response, reusing the cached one if the ETags are weakly equal so that the
+        same payload is neither decoded nor cached twice under cosmetically different ETags.
+        :param cached: The cache entry sent for revalidation, None if absent
+        :param response_headers: The headers of the response
+        :param content: The body of the response
+        :return: The decoded JSON payload
+        """
+        etag: Optional[str] = response_headers.get('ETag')
+
+        if cached is not None and etag is not None and cached.get('normalized_etag') == _normalize_etag(etag):
+            return cached['payload']
+
+        return orjson.loads(content)
+
+    def _handle_response(
+            self,
+            url: str,
+            cache_key: str,
+            cached: Optional[Dict[str, Any]],
+            status_code: int,
+            response_headers: Mapping[str, str],
+            content: bytes,
+            now: float
+    ) -> Tuple[bool, Optional[Payload]]:
+        """
+        Handle a response of the API, whatever the HTTP library used to get it.
+        :param url: The URL of the endpoint
+        :param cache_key: The cache key, see ``_cache_key``
+        :param cached: The cache entry sent for revalidation, None if absent
+        :param status_code: The HTTP status code of the response
+        :param response_headers: The headers of the response
+        :param content: The body of the response
+        :param now: Current timestamp from which the expiry is computed
+        :return: Whether the request must be retried, and the payload or None if an error occurred
+        """
+        if status_code == 304 and cached:
+            self.logger.info(f"The cached response for {url} is still valid")
+            self.bucket.increase_rate()
+            self._refresh_cache(cache_key, cached, response_headers, now)
+            return False, cached['payload']
+        elif status_code == 429:
+            self.logger.warning("The rate limit has been reached ")
+            self.bucket.decrease_rate()
+            return True, None
+        elif status_code == 200:
+            self.logger.info(f"The response for {url} is successful")
+            self.bucket.increase_rate()
+            payload: Payload = self._decode_payload(cached, response_headers, content)
+            self._cache_response(cache_key, response_headers, payload, now)
+
+            return False, payload
+        else:
+            self.logger.warning(f"The response for {url} is unsuccessful: HTTP code {status_code}")
+            self.logger.warning(f"The response for {url} is unsuccessful: {content.decode(errors='replace')}")
+            return False, None
+
+    @staticmethod
+    def _stops_params(query: Optional[str], fuzzy: bool, max_results: int) -> str:
+        """
+        Build the URL-encoded query string of the ``/stops`` endpoint, see ``get_stops``.
+        """
+        params: Dict[str, Any] = {
+            "results": max_results
+        }
+
+        if query is not None:
+            params['query'] = query
+            params['completion'] = True
+            params['fuzzy'] = fuzzy
+
+        return urlencode(params)
+
+    @staticmethod
+    @lru_cache(maxsize=256, typed=True)
+    def _radar_params(
+            north_latitude: float,
+            west_longitude: float,
+            south_latitude: float,
+            east_longitude: float,
+            max_number_of_vehicles: int,
+            seconds_between_frames: int,
+            frames: int,
+            polylines: bool,
+            language: str,
+            pretty_print_json: bool
+    ) -> str:
+        """
+        Build the URL-encoded query string of the ``/radar`` endpoint, see ``get_radar``.
+        Pollers cycle through a small set of areas, so query strings are memoized.
+        """
+        return urlencode({
+            "north": north_latitude,
+            "west": west_longitude,
+            "south": south_latitude,
+            "east": east_longitude,
+            "results": max_number_of_vehicles,
+            "duration": seconds_between_frames,
+            "frames": frames,
+            "polylines": polylines,
+            "language": language,
+            "pretty": pretty_print_json
+        })
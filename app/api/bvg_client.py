@@ -1,113 +1,96 @@
-import logging
+import threading
 import time
-from logging import Logger
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Tuple
 
 from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3 import Retry
 
-from config import Config
+from app.api.base_bvg_client import BaseBVGClient, Payload
 
 
-class BVGClient:
+class BVGClient(BaseBVGClient):
     """
-    Client for the BVG API
-    The API has no authentification but a rate limit of 100 requests per minute.
-    The API sends ETag and Cache-Control headers to allow the client to cache responses.
-    Cache format: ``{url: {"etag": str, "response": requests.Response, "expiry": float}}``
+    Client for the BVG API, keeping connections alive in a pooled ``requests`` session.
+    The cache, the rate limiting and the retry policy are described in ``BaseBVGClient``.
     """
-    logger: Logger = logging.getLogger("bvg_client")
-    base_url: str = "https://v6.bvg.transport.rest"
+    pool_connections: int = 4
+    pool_maxsize: int = 32
 
-    def __init__(
-            self,
-            max_retries: int = Config.BVG_API_MAX_RETRIES,
-            retry_delay_seconds: int = Config.BVG_API_RETRY_DELAY_SECONDS
-    ):
-        self.session: Session = Session()
-        self.cache: Dict[str, Any] = {}
-        self.max_retries: int = max_retries
-        self.retry_delay_seconds: int = retry_delay_seconds
-        self.logger.setLevel(Config.LOG_LEVEL)
+    @cached_property
+    def session(self) -> Session:
+        """
+        Session keeping connections to the API alive in a pool, created on first use.
+        Retries are disabled at the transport level as they are handled by ``_call_api``.
+        :return: The configured session
+        """
+        session: Session = Session()
+        adapter: HTTPAdapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False,
+            max_retries=Retry(total=0)
+        )
+        session.mount("https://", adapter)
+        session.headers.update(self.session_headers)
+
+        return session
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.session.close()
-
-    def _get_max_age(self, cache_control: str) -> Optional[int]:
-        try:
-            directives: List[str] = cache_control.split(",")
-
-            for directive in directives:
-                if directive.strip().startswith('max-age:'):
-                    return int(directive.strip().split(':')[1].strip())
-        except Exception:
-            self.logger.warning(f"Failed to parse cache control directive: {cache_control}")
-
-        return None
+        if self is not _default_client:
+            self.close()
 
+    def close(self) -> None:
+        """
+        Close the connections of the session, if it has been created.
+        """
+        if 'session' in self.__dict__:
+            self.session.close()
 
     def _call_api(
             self,
             url: str,
-            params: Optional[Dict[str, Any]] = None,
-            now: float = time.time()
-    ) -> Optional[Union[Dict[str, Any], List[Dict[str, Any]]]]:
+            params: Optional[str] = None
+    ) -> Optional[Payload]:
         """
         Call the API on the given URL and return the payload.
-        If the request limit has been reached it retries after ``retry_delay_seconds`` seconds.
+        If the request limit has been reached it retries with an exponential backoff (see ``_get_retry_delay``).
         The function attempts to recover a response from the cache if available.
         :param url:
-        :param params:
+        :param params: The URL-encoded query string
         :return:
         """
-        headers: Dict[str, Any] = {}
-        cached = self.cache.get(url)
+        now: float = self.timer()
+        cache_key: str = self._cache_key(url, params)
+        fresh: Optional[Dict[str, Any]] = self._cache_get_fresh(url, cache_key)
 
-        if cached is not None:
-            headers['If-None-Match'] = cached['etag']
+        if fresh is not None:
+            return fresh['payload']
 
-            if cached['expiry'] and cached['expiry'] > now:
-                self.logger.info(f"The cached response for {url} has not expired yet")
-                response: Response = cached['response']
-                return response.json()
+        cached: Optional[Dict[str, Any]] = self._cache_get(cache_key)
+        headers: Dict[str, str] = self._conditional_headers(cached)
 
         for attempt in range(1, self.max_retries + 1):
             self.logger.info(f"Attempt {attempt}/{self.max_retries} for {url}")
+            self.bucket.acquire()
             response: Response = self.session.get(
                 url=url,
                 params=params,
                 headers=headers,
             )
+            retry, payload = self._handle_response(
+                url, cache_key, cached, response.status_code, response.headers, response.content, now
+            )
 
-            if response.status_code == 304 and cached:
-                self.logger.info(f"The cached response for {url} is still valid")
-                return cached['response'].json()
-            elif response.status_code == 429:
-                self.logger.warning("The rate limit has been reached ")
-                time.sleep(self.retry_delay_seconds)
-                continue
-            elif response.status_code == 200:
-                self.logger.info(f"The response for {url} is successful")
-                etag: Optional[str] = response.headers.get('ETag')
-                cache_control: str = response.headers.get('Cache-Control', '')
-                max_age = self._get_max_age(cache_control)
-
-                if etag is not None:
-                    self.logger.info(f"An ETag is provided, caching the response")
-                    self.cache[url] = {
-                        'etag': etag,
-                        'response': response,
-                        'expiry': now + max_age if max_age is not None else None
-                    }
-
-                return response.json()
-
-            else:
-                self.logger.warning(f"The response for {url} is unsuccessful: HTTP code {response.status_code}")
-                self.logger.warning(f"The response for {url} is unsuccessful: {response.text}")
-                return None
+            if not retry:
+                return payload
+
+            time.sleep(self._get_retry_delay(response.headers, attempt))
 
         self.logger.error(f"All attempts for {url} have failed")
         return None
@@ -125,23 +108,11 @@ class BVGClient:
         :param max_results: Maximum number of returned results (API default is 5)
         :return: The API JSON response or None if an error occurred
         """
-        url: str = f"{self.base_url}/stops"
-        params: Dict[str, Any] = {
-            "results": max_results
-        }
-
-        if query is not None:
-            params['query'] = query
-            params['completion'] = True
-            params['fuzzy'] = fuzzy
-
-        response: List[Dict[str, Any]] = self._call_api(
-            url=url,
-            params=params
+        return self._call_api(
+            url=self.stops_url,
+            params=self._stops_params(query, fuzzy, max_results)
         )
 
-        return response
-
     def get_radar(
             self,
             north_latitude: float,
@@ -169,21 +140,53 @@ class BVGClient:
         :param pretty_print_json: Pretty-print JSON responses?
         :return: The API JSON response or None if an error occurred
         """
-        url: str = f"{self.base_url}/radar"
-        params: Dict[str, Any] = {
-            "north": north_latitude,
-            "west": west_longitude,
-            "south": south_latitude,
-            "east": east_longitude,
-            "results": max_number_of_vehicles,
-            "duration": seconds_between_frames,
-            "frames": frames,
-            "polylines": polylines,
-            "language": language,
-            "pretty": pretty_print_json
-        }
-
         return self._call_api(
-            url=url,
-            params=params
+            url=self.radar_url,
+            params=self._radar_params(
+                north_latitude,
+                west_longitude,
+                south_latitude,
+                east_longitude,
+                max_number_of_vehicles,
+                seconds_between_frames,
+                frames,
+                polylines,
+                language,
+                pretty_print_json
+            )
         )
+
+    def get_radar_bulk(
+            self,
+            bounding_boxes: List[Tuple[float, float, float, float]],
+            max_workers: int = 8,
+            **kwargs: Any
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Find all vehicles in several areas concurrently over the pooled session.
+        :param bounding_boxes: Areas as ``(north_latitude, west_longitude, south_latitude, east_longitude)`` tuples
+        :param max_workers: Number of concurrent requests, capped at the session pool size
+        :param kwargs: Other parameters forwarded to ``get_radar``
+        :return: The API JSON responses, or None for those where an error occurred, in the order of the areas
+        """
+        with ThreadPoolExecutor(max_workers=min(max_workers, self.pool_maxsize)) as executor:
+            return list(executor.map(lambda bounding_box: self.get_radar(*bounding_box, **kwargs), bounding_boxes))
+
+
+_default_client: Optional[BVGClient] = None
+_default_client_lock: threading.Lock = threading.Lock()
+
+
+def get_client() -> BVGClient:
+    """
+    Return the process-wide client, sharing its connection pool, cache and rate limiter.
+    Exiting its context manager does not close it.
+    :return: The shared client
+    """
+    global _default_client
+
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = BVGClient()
+
+    return _default_client
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Adaptive token bucket used to self-throttle requests before hitting the API rate limit.
+    Tokens are refilled continuously at ``refill_per_second`` up to ``capacity``. The refill rate increases additively
+    by ``rate_increase`` on each successful request, up to its initial value, and decreases multiplicatively by
+    ``rate_decrease_factor`` when the rate limit is reached, in which case the bucket is also emptied.
+    The bucket is thread-safe so it can be shared by concurrent requests.
+    """
+
+    def __init__(
+            self,
+            capacity: int,
+            refill_per_second: float,
+            rate_increase: float,
+            rate_decrease_factor: float,
+            min_refill_per_second: Optional[float] = None
+    ):
+        self.capacity: int = capacity
+        self.max_refill_per_second: float = refill_per_second
+        self.min_refill_per_second: float = min_refill_per_second or refill_per_second / capacity
+        self.refill_per_second: float = refill_per_second
+        self.rate_increase: float = rate_increase
+        self.rate_decrease_factor: float = rate_decrease_factor
+        self.tokens: float = capacity
+        self.last_refill: float = time.monotonic()
+        self.lock: threading.Lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now: float = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.refill_per_second)
+        self.last_refill = now
+
+    def reserve(self) -> float:
+        """
+        Try to take a token from the bucket without blocking.
+        :return: 0 if a token was taken, otherwise the number of seconds to wait before trying again
+        """
+        with self.lock:
+            self._refill()
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+
+            return (1 - self.tokens) / self.refill_per_second
+
+    def acquire(self) -> None:
+        """
+        Take a token from the bucket, blocking until one is available.
+        """
+        while (wait_seconds := self.reserve()) > 0:
+            time.sleep(wait_seconds)
+
+    async def acquire_async(self) -> None:
+        """
+        Take a token from the bucket, yielding to the event loop until one is available.
+        """
+        while (wait_seconds := self.reserve()) > 0:
+            await asyncio.sleep(wait_seconds)
+
+    def increase_rate(self) -> None:
+        """
+        Additively increase the refill rate after a successful request.
+        """
+        with self.lock:
+            self._refill()
+            self.refill_per_second = min(self.max_refill_per_second, self.refill_per_second + self.rate_increase)
+
+    def decrease_rate(self) -> None:
+        """
+        Multiplicatively decrease the refill rate and empty the bucket after the rate limit has been reached.
+        """
+        with self.lock:
+            self._refill()
+            self.refill_per_second = max(self.min_refill_per_second, self.refill_per_second * self.rate_decrease_factor)
+            self.tokens = 0
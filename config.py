@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 from os import getenv
 from typing import Dict, Type
 
@@ -10,6 +11,11 @@ class BaseConfig:
     # API
     BVG_API_MAX_RETRIES: int = 0
     BVG_API_RETRY_DELAY_SECONDS: int = 0
+    BVG_API_CACHE_MAX_SIZE: int = 0
+    BVG_API_RATE_LIMIT_CAPACITY: int = 0
+    BVG_API_RATE_LIMIT_PER_SECOND: float = 0
+    BVG_API_RATE_LIMIT_INCREASE: float = 0
+    BVG_API_RATE_LIMIT_DECREASE_FACTOR: float = 0
 
     # Logging
     LOG_LEVEL: int = 0
@@ -19,6 +25,11 @@ class ProdConfig(BaseConfig):
     # API
     BVG_API_MAX_RETRIES: int = 10
     BVG_API_RETRY_DELAY_SECONDS: int = 5
+    BVG_API_CACHE_MAX_SIZE: int = 1024
+    BVG_API_RATE_LIMIT_CAPACITY: int = 100
+    BVG_API_RATE_LIMIT_PER_SECOND: float = 100 / 60
+    BVG_API_RATE_LIMIT_INCREASE: float = 0.1
+    BVG_API_RATE_LIMIT_DECREASE_FACTOR: float = 0.5
 
     # Logging
     LOG_LEVEL: int = logging.WARNING
@@ -28,6 +39,11 @@ class TestConfig(BaseConfig):
     # API
     BVG_API_MAX_RETRIES: int = 3
     BVG_API_RETRY_DELAY_SECONDS: int = 0
+    BVG_API_CACHE_MAX_SIZE: int = 1024
+    BVG_API_RATE_LIMIT_CAPACITY: int = 100
+    BVG_API_RATE_LIMIT_PER_SECOND: float = 1000
+    BVG_API_RATE_LIMIT_INCREASE: float = 100
+    BVG_API_RATE_LIMIT_DECREASE_FACTOR: float = 0.5
 
     # Logging
     LOG_LEVEL: int = logging.DEBUG
@@ -38,6 +54,17 @@ configs: Dict[str, Type[BaseConfig]] = {
     'test': TestConfig,
 }
 
-ENV: str = getenv('ENV')
 
-Config: Type[BaseConfig] = configs[ENV]
+@lru_cache
+def get_config() -> Type[BaseConfig]:
+    """
+    Return the configuration of the environment given by the ``ENV`` variable, ``prod`` by default.
+    The configuration is resolved on first call, call ``get_config.cache_clear()`` after changing ``ENV``.
+    :return: The configuration class
+    """
+    env: str = getenv('ENV', 'prod')
+
+    if env not in configs:
+        raise ValueError(f"Unknown environment {env!r}, expected one of {', '.join(configs)}")
+
+    return configs[env]
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List
+
+import httpx
+
+from app.api.async_bvg_client import AsyncBVGClient
+
+
+def _run(handler, coroutine_factory):
+    async def main():
+        async with AsyncBVGClient(transport=httpx.MockTransport(handler)) as bvg_client:
+            return await coroutine_factory(bvg_client)
+
+    return asyncio.run(main())
+
+
+def test_call_api_http_200_then_304():
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+
+        if request.headers.get('If-None-Match') == 'etag':
+            return httpx.Response(304)
+
+        return httpx.Response(200, headers={'ETag': 'etag'}, content=b'{"data": "cached"}')
+
+    async def calls(bvg_client: AsyncBVGClient):
+        url: str = bvg_client.radar_url
+        return [await bvg_client._call_api(url=url), await bvg_client._call_api(url=url)]
+
+    assert _run(handler, calls) == [{'data': 'cached'}, {'data': 'cached'}]
+    assert len(requests) == 2
+
+
+def test_call_api_http_429_rate_limited(caplog):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, text="Too many requests")
+
+    async def calls(bvg_client: AsyncBVGClient):
+        return await bvg_client._call_api(url=bvg_client.radar_url)
+
+    assert _run(handler, calls) is None
+    assert caplog.record_tuples[-1] == (
+        'bvg_client',
+        logging.ERROR,
+        f'All attempts for {AsyncBVGClient.radar_url} have failed'
+    )
+
+
+def test_get_stops_query():
+    with open("tests/api/response_samples/stops/query.json", "rb") as file:
+        api_response_content: bytes = file.read()
+        expected: List[Dict[str, Any]] = json.loads(str(api_response_content, "utf-8"))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert dict(request.url.params) == {
+            'results': '1', 'query': 'Gleisdreieck', 'completion': 'True', 'fuzzy': 'True'
+        }
+        return httpx.Response(200, content=api_response_content)
+
+    async def calls(bvg_client: AsyncBVGClient):
+        return await bvg_client.get_stops(query="Gleisdreieck", max_results=1)
+
+    assert _run(handler, calls) == expected
+
+
+def test_get_radar_bulk():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=json.dumps({'north': request.url.params['north']}).encode())
+
+    async def calls(bvg_client: AsyncBVGClient):
+        return await bvg_client.get_radar_bulk([
+            (52.52411, 13.41002, 52.51942, 13.41709),
+            (52.51, 13.41, 52.51, 13.41),
+        ])
+
+    assert _run(handler, calls) == [{'north': '52.52411'}, {'north': '52.51'}]
+
+
+def test_get_radar_bulk_max_workers():
+    active: List[int] = [0]
+    peak: List[int] = [0]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return httpx.Response(200, content=b'{}')
+
+    async def calls(bvg_client: AsyncBVGClient):
+        return await bvg_client.get_radar_bulk([(52.5 + i / 100, 13.4, 52.5, 13.4) for i in range(4)], max_workers=2)
+
+    assert _run(handler, calls) == [{}, {}, {}, {}]
+    assert peak[0] == 2
+
+
+def test_aexit_closes_client():
+    async def main():
+        async with AsyncBVGClient() as bvg_client:
+            pass
+
+        return bvg_client.client.is_closed
+
+    assert asyncio.run(main())
@@ -1,18 +1,69 @@
 import json
 import logging
 import os
+import random
 from datetime import datetime
 from typing import Any, Dict, List
 
 import requests
-from requests import Response
 
-from app.api.bvg_client import BVGClient
+from app.api.base_bvg_client import _normalize_etag
+from app.api.bvg_client import BVGClient, get_client
+
+
+def test_session_pooled_adapter():
+    with BVGClient() as bvg_client:
+        adapter = bvg_client.session.get_adapter(bvg_client.base_url)
+        assert adapter._pool_maxsize == bvg_client.pool_maxsize
+        assert adapter.max_retries.total == 0
+        assert bvg_client.session.headers['Connection'] == 'keep-alive'
+
+
+def test_session_lazy():
+    with BVGClient() as bvg_client:
+        assert 'session' not in bvg_client.__dict__
+
+
+def test_get_client_shared(monkeypatch):
+    closed: List[bool] = []
+
+    with get_client() as bvg_client:
+        monkeypatch.setattr(bvg_client.session, 'close', lambda: closed.append(True))
+
+    assert get_client() is bvg_client
+    assert closed == []
+
+
+def test_normalize_etag():
+    assert _normalize_etag('"35ebdc53"') == '35ebdc53'
+    assert _normalize_etag('35ebdc53') == '35ebdc53'
+    assert _normalize_etag('W/"35ebdc53"') == '35ebdc53'
+    assert _normalize_etag(' W/"35ebdc53" ') == '35ebdc53'
+    assert _normalize_etag('"') == '"'
+
+
+def test_call_api_weak_etag_reuses_payload(requests_mock):
+    with BVGClient() as bvg_client:
+        url: str = f"{bvg_client.base_url}/radar"
+        requests_mock.get(url, status_code=200, headers={'ETag': '"etag"'}, content=b'{"data": "cached"}')
+        payload: Dict[str, Any] = bvg_client._call_api(url=url)
+
+        requests_mock.get(url, status_code=200, headers={'ETag': 'W/"etag"'}, content=b'{"data": "cached"}')
+
+        assert bvg_client._call_api(url=url) is payload
+        assert requests_mock.last_request.headers['If-None-Match'] == '"etag"'
+        assert bvg_client.validators[url]['etag'] == 'W/"etag"'
+        assert bvg_client.validators[url]['normalized_etag'] == 'etag'
 
 
 def test_get_max_age_valid():
     with BVGClient() as bvg_client:
-        assert bvg_client._get_max_age("public, max-age: 3600, toto") == 3600
+        assert bvg_client._get_max_age("public, max-age=3600, toto") == 3600
+
+
+def test_get_max_age_first_match():
+    with BVGClient() as bvg_client:
+        assert bvg_client._get_max_age("private,max-age=60, s-maxage=120, max-age=3600") == 60
 
 
 def test_get_max_age_missing(caplog):
@@ -23,19 +74,13 @@ def test_get_max_age_missing(caplog):
 
 def test_get_max_age_invalid_1(caplog):
     with BVGClient() as bvg_client:
-        assert bvg_client._get_max_age("max-age: oopsie") is None
-        assert caplog.record_tuples == [
-            (
-                'bvg_client',
-                logging.WARNING,
-                'Failed to parse cache control directive: max-age: oopsie'
-            )
-        ]
+        assert bvg_client._get_max_age("max-age=oopsie") is None
+        assert caplog.record_tuples == []
 
 
 def test_get_max_age_invalid_2(caplog):
     with BVGClient() as bvg_client:
-        assert bvg_client._get_max_age("max-age-invalid:3600") is None
+        assert bvg_client._get_max_age("max-age-invalid=3600") is None
         assert caplog.record_tuples == []
 
 
@@ -50,17 +95,11 @@ def test_call_api_still_valid_cache(requests_mock, caplog):
         url: str = f"{bvg_client.base_url}/radar"
         requests_mock.get(url, status_code=304)
 
-        response: Response = Response()
-        response._content = b'{"data": "cached"}'
-        response.status_code = 200
-
-        bvg_client.cache = {
-            url: {
-                'etag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
-                'response': response,
-                'expiry': datetime(2100, 1, 1).timestamp()  # still valid
-            }
-        }
+        bvg_client._cache_put(url, {
+            'etag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
+            'payload': {'data': 'cached'},
+            'expiry': datetime(2100, 1, 1).timestamp()  # still valid
+        })
 
         assert bvg_client._call_api(url=url) == {'data': 'cached'}
         assert caplog.record_tuples == [
@@ -72,22 +111,40 @@ def test_call_api_still_valid_cache(requests_mock, caplog):
         ]
 
 
+def test_call_api_expiry_uses_timer(requests_mock):
+    clock: List[float] = [0]
+
+    with BVGClient(timer=lambda: clock[0]) as bvg_client:
+        url: str = f"{bvg_client.base_url}/radar"
+        requests_mock.get(
+            url,
+            status_code=200,
+            headers={'ETag': 'etag', 'Cache-Control': 'max-age=3600'},
+            content=b'{"data": "cached"}'
+        )
+
+        bvg_client._call_api(url=url)
+        clock[0] = 1800
+        bvg_client._call_api(url=url)
+
+        assert requests_mock.call_count == 1
+
+        clock[0] = 7200
+        bvg_client._call_api(url=url)
+
+        assert requests_mock.call_count == 2
+
+
 def test_call_api_http_304_valid_cache(requests_mock, caplog):
     with BVGClient(retry_delay_seconds=0) as bvg_client:
         url: str = f"{bvg_client.base_url}/radar"
         requests_mock.get(url, status_code=304)
 
-        response: Response = Response()
-        response._content = b'{"data": "cached"}'
-        response.status_code = 200
-
-        bvg_client.cache = {
-            url: {
-                'etag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
-                'response': response,
-                'expiry': datetime(2000, 1, 1).timestamp()  # expired
-            }
-        }
+        bvg_client._cache_put(url, {
+            'etag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
+            'payload': {'data': 'cached'},
+            'expiry': datetime(2000, 1, 1).timestamp()  # expired
+        })
 
         assert bvg_client._call_api(url=url) == {'data': 'cached'}
         assert caplog.record_tuples == [
@@ -103,6 +160,57 @@ def test_call_api_http_304_valid_cache(requests_mock, caplog):
         ]
 
 
+def test_call_api_http_304_reuses_decoded_payload(requests_mock):
+    with BVGClient() as bvg_client:
+        url: str = f"{bvg_client.base_url}/radar"
+        requests_mock.get(url, status_code=200, headers={'ETag': 'etag'}, content=b'{"data": "cached"}')
+        payload: Dict[str, Any] = bvg_client._call_api(url=url)
+
+        requests_mock.get(url, status_code=304)
+
+        assert bvg_client._call_api(url=url) is payload
+
+
+def test_call_api_http_304_refreshes_expiry(requests_mock):
+    clock: List[float] = [0]
+
+    with BVGClient(timer=lambda: clock[0]) as bvg_client:
+        url: str = f"{bvg_client.base_url}/radar"
+        requests_mock.get(
+            url,
+            status_code=200,
+            headers={'ETag': 'etag', 'Cache-Control': 'max-age=60'},
+            content=b'{"data": "cached"}'
+        )
+        bvg_client._call_api(url=url)
+
+        requests_mock.get(url, status_code=304, headers={'ETag': 'new-etag'})
+        clock[0] = 100
+
+        assert bvg_client._call_api(url=url) == {'data': 'cached'}
+
+        clock[0] = 101
+
+        assert bvg_client._call_api(url=url) == {'data': 'cached'}
+        assert requests_mock.call_count == 2
+        assert bvg_client.cache[url]['expiry'] == 160
+        assert bvg_client.cache[url]['etag'] == 'new-etag'
+
+
+def test_call_api_http_304_last_modified(requests_mock):
+    with BVGClient() as bvg_client:
+        url: str = f"{bvg_client.base_url}/radar"
+        last_modified: str = 'Wed, 15 Oct 2026 09:00:00 GMT'
+        requests_mock.get(url, status_code=200, headers={'Last-Modified': last_modified}, content=b'{"data": "cached"}')
+        bvg_client._call_api(url=url)
+
+        requests_mock.get(url, status_code=304)
+
+        assert bvg_client._call_api(url=url) == {'data': 'cached'}
+        assert requests_mock.last_request.headers['If-Modified-Since'] == last_modified
+        assert 'If-None-Match' not in requests_mock.last_request.headers
+
+
 def test_call_api_http_429_rate_limited(requests_mock, caplog):
     with BVGClient(retry_delay_seconds=0) as bvg_client:
         url: str = f"{bvg_client.base_url}/radar"
@@ -141,30 +249,48 @@ def test_call_api_http_429_rate_limited(requests_mock, caplog):
         ]
 
 
+def test_get_retry_delay_retry_after():
+    with BVGClient(retry_delay_seconds=1) as bvg_client:
+        assert bvg_client._get_retry_delay({'Retry-After': '12'}, attempt=1) == 12
+
+
+def test_get_retry_delay_retry_after_capped():
+    with BVGClient(retry_delay_seconds=1) as bvg_client:
+        assert bvg_client._get_retry_delay({'Retry-After': '86400'}, attempt=1) == bvg_client.max_retry_delay_seconds
+
+
+def test_get_retry_delay_exponential_backoff(monkeypatch):
+    monkeypatch.setattr(random, 'uniform', lambda a, b: b)
+
+    with BVGClient(retry_delay_seconds=1) as bvg_client:
+        response_headers: Dict[str, str] = {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}  # dates are not supported
+        assert [bvg_client._get_retry_delay(response_headers, attempt) for attempt in range(1, 9)] == [
+            1, 2, 4, 8, 16, 32, 60, 60
+        ]
+
+
 def test_call_api_http_200(requests_mock, caplog):
-    with BVGClient(retry_delay_seconds=0) as bvg_client:
+    with BVGClient(retry_delay_seconds=0, timer=lambda: datetime(2000, 1, 1).timestamp()) as bvg_client:
         url: str = f"{bvg_client.base_url}/radar"
         requests_mock.get(
             url,
             status_code=200,
             headers={
                 'ETag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
-                'Cache-Control': 'original, max-age: 3600, public',
+                'Cache-Control': 'original, max-age=3600, public',
             },
             content=b'{"data": "cached"}'
         )
 
-        assert bvg_client._call_api(
-            url=url,
-            now=datetime(2000, 1, 1).timestamp()
-        ) == {'data': 'cached'}
-
-        cache: Dict[str, Dict[str, Any]] = bvg_client.cache
-        del cache[url]['response']
+        assert bvg_client._call_api(url=url) == {'data': 'cached'}
 
-        assert bvg_client.cache == {
+        assert bvg_client.cache == bvg_client.validators == {
             url: {
                 'etag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
+                'normalized_etag': '35ebdc53-96a9-4ce3-963c-79e4435281d0',
+                'last_modified': None,
+                'payload': {'data': 'cached'},
+                'max_age': 3600,
                 'expiry': 946688400.0
             }
         }
@@ -185,6 +311,41 @@ def test_call_api_http_200(requests_mock, caplog):
         ]
 
 
+def test_call_api_cache_lru_eviction(requests_mock):
+    with BVGClient(cache_max_size=2) as bvg_client:
+        urls: List[str] = [f"{bvg_client.base_url}/{endpoint}" for endpoint in ("radar", "stops", "trips")]
+
+        for url in urls:
+            requests_mock.get(url, status_code=200, headers={'ETag': url}, content=b'{"data": "cached"}')
+
+        bvg_client._call_api(url=urls[0])
+        bvg_client._call_api(url=urls[1])
+        bvg_client._call_api(url=urls[0])  # radar becomes the most recently used entry
+        bvg_client._call_api(url=urls[2])
+
+        assert list(bvg_client.validators.keys()) == [urls[0], urls[2]]
+
+
+def test_call_api_fresh_hit_keeps_validators(requests_mock):
+    with BVGClient(cache_max_size=2) as bvg_client:
+        urls: List[str] = [f"{bvg_client.base_url}/{endpoint}" for endpoint in ("hot", "a", "b")]
+
+        for url in urls:
+            requests_mock.get(
+                url,
+                status_code=200,
+                headers={'ETag': url, 'Cache-Control': 'max-age=3600'},
+                content=b'{"data": "cached"}'
+            )
+
+        bvg_client._call_api(url=urls[0])
+        bvg_client._call_api(url=urls[1])
+        bvg_client._call_api(url=urls[0])  # fresh hit
+        bvg_client._call_api(url=urls[2])
+
+        assert list(bvg_client.validators.keys()) == [urls[0], urls[2]]
+
+
 def test_call_api_http_404_not_found(requests_mock, caplog):
     with BVGClient() as bvg_client:
         url: str = f"{bvg_client.base_url}/bad-endpoint"
@@ -304,3 +465,59 @@ def test_get_radar_bad_parameters(requests_mock):
             south_latitude=52.51,
             east_longitude=13.41,
         ) == expected
+
+
+def test_get_radar_bulk(requests_mock):
+    with BVGClient() as bvg_client:
+        requests_mock.get(
+            f"{bvg_client.base_url}/radar?north=52.52411&west=13.41002&south=52.51942&east=13.41709",
+            content=b'{"data": "first"}',
+        )
+        requests_mock.get(
+            f"{bvg_client.base_url}/radar?north=52.51&west=13.41&south=52.51&east=13.41",
+            content=b'{"data": "second"}',
+        )
+
+        assert bvg_client.get_radar_bulk([
+            (52.52411, 13.41002, 52.51942, 13.41709),
+            (52.51, 13.41, 52.51, 13.41),
+        ]) == [{'data': 'first'}, {'data': 'second'}]
+
+
+def test_get_radar_cached_per_area(requests_mock):
+    with BVGClient() as bvg_client:
+        requests_mock.get(
+            f"{bvg_client.base_url}/radar?north=52.52411&west=13.41002&south=52.51942&east=13.41709",
+            headers={'ETag': 'first', 'Cache-Control': 'max-age=3600'},
+            content=b'{"data": "first"}',
+        )
+        requests_mock.get(
+            f"{bvg_client.base_url}/radar?north=52.51&west=13.41&south=52.51&east=13.41",
+            headers={'ETag': 'second', 'Cache-Control': 'max-age=3600'},
+            content=b'{"data": "second"}',
+        )
+
+        assert bvg_client.get_radar(52.52411, 13.41002, 52.51942, 13.41709) == {'data': 'first'}
+        assert bvg_client.get_radar(52.51, 13.41, 52.51, 13.41) == {'data': 'second'}
+        assert bvg_client.get_radar(52.52411, 13.41002, 52.51942, 13.41709) == {'data': 'first'}
+        assert requests_mock.call_count == 2
+
+
+def test_radar_params_typed():
+    assert BVGClient._radar_params(52, 13, 52, 13, 256, 30, 1, True, 'en', False) \
+        != BVGClient._radar_params(52.0, 13, 52, 13, 256, 30, 1, 1, 'en', False)
+
+
+def test_cache_put_expired_entry_kept_in_validators():
+    with BVGClient(timer=lambda: 100) as bvg_client:
+        url: str = f"{bvg_client.base_url}/radar"
+        bvg_client._cache_put(url, {
+            'etag': 'etag',
+            'last_modified': None,
+            'payload': {'data': 'cached'},
+            'max_age': 60,
+            'expiry': 99
+        })
+
+        assert url not in bvg_client.cache
+        assert bvg_client.validators[url]['etag'] == 'etag'
@@ -0,0 +1,49 @@
+import time
+
+from app.api.token_bucket import TokenBucket
+
+
+def test_acquire_consumes_tokens():
+    bucket: TokenBucket = TokenBucket(capacity=5, refill_per_second=1, rate_increase=1, rate_decrease_factor=0.5)
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert bucket.tokens < 1
+
+
+def test_acquire_blocks_until_refilled():
+    bucket: TokenBucket = TokenBucket(capacity=1, refill_per_second=20, rate_increase=1, rate_decrease_factor=0.5)
+    bucket.acquire()
+
+    start: float = time.monotonic()
+    bucket.acquire()
+
+    assert time.monotonic() - start >= 0.04
+
+
+def test_decrease_rate():
+    bucket: TokenBucket = TokenBucket(capacity=10, refill_per_second=8, rate_increase=1, rate_decrease_factor=0.5)
+    bucket.decrease_rate()
+
+    assert bucket.refill_per_second == 4
+    assert bucket.tokens == 0
+
+
+def test_decrease_rate_lower_bound():
+    bucket: TokenBucket = TokenBucket(capacity=10, refill_per_second=8, rate_increase=1, rate_decrease_factor=0.01)
+    bucket.decrease_rate()
+
+    assert bucket.refill_per_second == 0.8
+
+
+def test_increase_rate_upper_bound():
+    bucket: TokenBucket = TokenBucket(capacity=10, refill_per_second=8, rate_increase=3, rate_decrease_factor=0.5)
+    bucket.decrease_rate()
+    bucket.increase_rate()
+
+    assert bucket.refill_per_second == 7
+
+    bucket.increase_rate()
+
+    assert bucket.refill_per_second == 8
@@ -0,0 +1,98 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from os import getenv
+from typing import List
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.models import LineProductEnum, LineProductType, PositionRow, Vehicle, VehiclePosition, _PositionRowsReader
+
+DATABASE_URL: str = getenv('DATABASE_URL')
+
+
+@pytest.mark.parametrize("line_product", list(LineProductEnum))
+def test_line_product_type_round_trip(line_product: LineProductEnum):
+    line_product_type: LineProductType = LineProductType()
+    code: int = line_product_type.process_bind_param(line_product, dialect=None)
+
+    assert isinstance(code, int)
+    assert line_product_type.process_result_value(code, dialect=None) is line_product
+
+
+def test_line_product_type_codes():
+    assert LineProductType().process_bind_param(LineProductEnum.BUS, dialect=None) == 1
+    assert LineProductType().process_result_value(7, dialect=None) is LineProductEnum.REGIONAL
+
+
+def test_line_product_type_unique_codes():
+    assert len(set(LineProductType.codes.values())) == len(LineProductEnum)
+
+
+def test_line_product_type_none():
+    assert LineProductType().process_bind_param(None, dialect=None) is None
+    assert LineProductType().process_result_value(None, dialect=None) is None
+
+
+def test_position_rows_reader_chunks():
+    vehicle_id: uuid.UUID = uuid.UUID('35ebdc53-96a9-4ce3-963c-79e4435281d0')
+    rows: List[PositionRow] = [
+        (vehicle_id, datetime(2026, 10, 15, 9, 0, second), 52.52411, 13.41002, date(2026, 10, 15))
+        for second in range(3)
+    ]
+    reader: _PositionRowsReader = _PositionRowsReader(rows)
+    chunks: List[str] = []
+
+    while chunk := reader.read(16):
+        chunks.append(chunk)
+
+    assert all(len(chunk) <= 16 for chunk in chunks)
+    assert ''.join(chunks) == ''.join(
+        f"{vehicle_id},2026-10-15 09:00:0{second},52.52411,13.41002,2026-10-15\r\n" for second in range(3)
+    )
+
+
+def test_position_rows_reader_rejects_aware_timestamps():
+    reader: _PositionRowsReader = _PositionRowsReader([
+        (uuid.uuid4(), datetime(2026, 10, 15, 9, tzinfo=timezone(timedelta(hours=2))), 52.5, 13.4, date(2026, 10, 15))
+    ])
+
+    with pytest.raises(ValueError, match="Timezone-aware timestamp"):
+        reader.read()
+
+
+@pytest.mark.skipif(DATABASE_URL is None, reason="Requires the Postgres database, DATABASE_URL is not set")
+def test_bulk_insert():
+    partition_dt: date = date.today()
+    timestamp: datetime = datetime.combine(partition_dt, datetime.min.time())
+
+    with Session(create_engine(DATABASE_URL)) as session:
+        vehicle: Vehicle = Vehicle(
+            trip_id='test-trip',
+            line_product=LineProductEnum.SUBWAY,
+            line_name='U1',
+            partition_dt=partition_dt
+        )
+        session.add(vehicle)
+        session.flush()
+
+        VehiclePosition.bulk_insert(session.connection(), [
+            (vehicle.id, timestamp + timedelta(seconds=second), 52.5 + second / 100, 13.4, partition_dt)
+            for second in range(3)
+        ])
+
+        positions: List[VehiclePosition] = list(session.scalars(
+            select(VehiclePosition)
+            .where(VehiclePosition.vehicle_id == vehicle.id)
+            .order_by(VehiclePosition.timestamp)
+        ))
+
+        assert [(position.timestamp, position.latitude, position.longitude) for position in positions] == [
+            (timestamp + timedelta(seconds=second), 52.5 + second / 100, 13.4) for second in range(3)
+        ]
+        session.expire_all()
+
+        assert session.get(Vehicle, (vehicle.id, partition_dt)).line_product is LineProductEnum.SUBWAY
+
+        session.rollback()
@@ -0,0 +1,27 @@
+import pytest
+
+from config import ProdConfig, TestConfig, get_config
+
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    get_config.cache_clear()
+    yield
+    get_config.cache_clear()
+
+
+def test_get_config(monkeypatch):
+    monkeypatch.setenv('ENV', 'test')
+    assert get_config() is TestConfig
+
+
+def test_get_config_default_prod(monkeypatch):
+    monkeypatch.delenv('ENV', raising=False)
+    assert get_config() is ProdConfig
+
+
+def test_get_config_unknown(monkeypatch):
+    monkeypatch.setenv('ENV', 'staging')
+
+    with pytest.raises(ValueError, match="Unknown environment 'staging'"):
+        get_config()